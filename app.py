@@ -1,21 +1,33 @@
 #20260126
 
+from __future__ import annotations
+
+import functools
+import logging
+import math
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from urllib.parse import quote
+from zoneinfo import ZoneInfo
 
-import pandas as pd
 import streamlit as st
-import requests
-
-import folium
-from folium.plugins import MarkerCluster
-from streamlit_folium import st_folium
 
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
+from lazy_imports import LazyModule, import_report
 
-import openai
+# 무거운 의존성은 처음 쓰일 때 로딩 (콜드 스타트 단축)
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+requests = LazyModule("requests")
+folium = LazyModule("folium")
+folium_plugins = LazyModule("folium.plugins")
+streamlit_folium = LazyModule("streamlit_folium")
+geopy_geocoders = LazyModule("geopy.geocoders")
+geopy_distance = LazyModule("geopy.distance")
+openai = LazyModule("openai")
 
 # -----------------------------
 # Page Config
@@ -26,6 +38,8 @@ st.set_page_config(
     page_icon="🚻",
 )
 
+log = logging.getLogger(__name__)
+
 APP_TITLE_HTML = '<h1 class="big-title">SEOUL<br>TOILET FINDER</h1>'
 
 # -----------------------------
@@ -42,12 +56,10 @@ def get_secret(key: str) -> str:
 def get_api_keys():
     youtube = get_secret("YOUTUBE_API_KEY")
     openai_key = get_secret("OPENAI_API_KEY")
-    seoul = get_secret("SEOUL_API_KEY")  # 나중에 사용 가능
+    seoul = get_secret("SEOUL_API_KEY")
 
     return youtube, openai_key, seoul
 
-YOUTUBE_API_KEY, OPENAI_API_KEY, SEOUL_API_KEY = get_api_keys()
-
 # -----------------------------
 # Styles
 # -----------------------------
@@ -201,6 +213,15 @@ LANG = {
         "metric_nearest": "NEAREST",
         "finding_vlogs": "Finding Vlogs...",
         "facility": "시설",
+        "filter_label": "편의시설 필터",
+        "fac_diaper": "기저귀교환대",
+        "fac_bell": "비상벨",
+        "fac_cctv": "CCTV",
+        "fac_unisex": "남녀공용",
+        "fac_disabled": "장애인화장실",
+        "fac_male": "남자화장실",
+        "fac_female": "여자화장실",
+        "fac_open_now": "지금 개방중",
         "question_label": "💬 질문",
         "search_web": "웹에서 보기",
         "route_try": "앱으로 길찾기(시도)",
@@ -252,6 +273,15 @@ LANG = {
         "metric_nearest": "NEAREST",
         "finding_vlogs": "Finding Vlogs...",
         "facility": "Facility",
+        "filter_label": "Facility Filter",
+        "fac_diaper": "Diaper station",
+        "fac_bell": "Emergency bell",
+        "fac_cctv": "CCTV",
+        "fac_unisex": "Unisex",
+        "fac_disabled": "Accessible toilet",
+        "fac_male": "Men's room",
+        "fac_female": "Women's room",
+        "fac_open_now": "Open now",
         "question_label": "💬 Question",
         "search_web": "Open on web",
         "route_try": "Try route in app",
@@ -267,40 +297,164 @@ def toggle_language():
     st.session_state.lang = "en" if st.session_state.lang == "ko" else "ko"
 
 # -----------------------------
-# Data Loading (CSV 버전 유지 - 나중에 API로 교체 가능)
+# Facility bitmask (적재 시 한 번만 계산)
 # -----------------------------
-@st.cache_data(show_spinner=False)
-def load_toilet_data(file_path: str = "seoul_toilet.csv") -> pd.DataFrame:
+FAC_DIAPER = 1 << 0
+FAC_BELL = 1 << 1
+FAC_CCTV = 1 << 2
+FAC_UNISEX = 1 << 3
+FAC_DISABLED = 1 << 4
+FAC_MALE = 1 << 5
+FAC_FEMALE = 1 << 6
+FAC_ALWAYS_OPEN = 1 << 7
+
+# 필터 키 -> 비트 ("open_now"는 시간에 따라 달라지므로 조회 시 계산)
+FACILITY_BITS = {
+    "diaper": FAC_DIAPER,
+    "bell": FAC_BELL,
+    "cctv": FAC_CCTV,
+    "unisex": FAC_UNISEX,
+    "disabled": FAC_DISABLED,
+    "male": FAC_MALE,
+    "female": FAC_FEMALE,
+}
+FACILITY_ICONS = [(FAC_DIAPER, "👶"), (FAC_BELL, "🚨"), (FAC_CCTV, "📷"), (FAC_UNISEX, "👫"), (FAC_DISABLED, "♿")]
+
+WEEKDAYS_KO = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"]
+HOURS_RE = r"(\d{1,2}):(\d{2})\s*~\s*(?:익일)?\s*(\d{1,2}):(\d{2})"
+
+def _raw_text(raw: pd.DataFrame, col: str):
+    if col in raw.columns:
+        return raw[col].fillna("").astype(str)
+    return pd.Series("", index=raw.index, dtype=str)
+
+def facility_columns(raw: pd.DataFrame) -> dict:
+    """원본 행에서 편의시설 비트마스크(fac)와 개방시간 컬럼(open_min, close_min, closed_days) 계산"""
+    amenity = _raw_text(raw, "편의시설 (기타설비)")
+    safety = _raw_text(raw, "안내표지")
+    rooms = _raw_text(raw, "화장실 현황")
+    disabled = _raw_text(raw, "장애인화장실 현황").str.strip()
+    # 예전 컬럼명(남녀공용화장실여부 등)으로 오는 데이터도 같은 비트로 처리
+    old_diaper = _raw_text(raw, "기저귀교환대장소").str.strip()
+    old_bell = _raw_text(raw, "비상벨설치여부")
+    old_cctv = _raw_text(raw, "CCTV설치여부")
+    old_unisex = _raw_text(raw, "남녀공용화장실여부")
+
+    flags = {
+        FAC_DIAPER: amenity.str.contains("기저귀") | ~old_diaper.isin(["", "-", "정보없음", "nan"]),
+        FAC_BELL: safety.str.contains("비상벨") | (old_bell == "Y") | old_bell.str.contains("설치"),
+        FAC_CCTV: safety.str.contains("CCTV") | (old_cctv == "Y") | old_cctv.str.contains("설치"),
+        FAC_UNISEX: rooms.str.contains("공용") | (old_unisex == "Y"),
+        FAC_DISABLED: ~disabled.isin(["", "|"]),
+        FAC_MALE: rooms.str.contains("남자"),
+        FAC_FEMALE: rooms.str.contains("여자"),
+    }
+
+    hours = _raw_text(raw, "개방시간")
+    times = hours.str.extract(HOURS_RE).astype(float)
+    open_min = (times[0] * 60 + times[1]).fillna(-1)
+    close_min = (times[2] * 60 + times[3]).fillna(-1)
+    flags[FAC_ALWAYS_OPEN] = hours.str.contains("상시") | ((open_min >= 0) & (open_min == close_min))
+
+    fac = np.zeros(len(raw), dtype=np.uint16)
+    for bit, flag in flags.items():
+        fac |= np.where(flag.to_numpy(), bit, 0).astype(np.uint16)
+
+    # 이 데이터셋은 '소재지 용도' 컬럼에 휴무 요일이 들어 있음 ("기타|둘째,넷째 월요일|" 같은 격주 휴무는 제외)
+    holidays = _raw_text(raw, "소재지 용도")
+    closed_days = np.zeros(len(raw), dtype=np.uint8)
+    for i, day in enumerate(WEEKDAYS_KO):
+        closed = holidays.str.contains(day) & ~holidays.str.contains("기타")
+        if i >= 5:
+            closed |= hours.str.contains("평일") & ~hours.str.contains("토|주말")
+        closed_days |= np.where(closed.to_numpy(), 1 << i, 0).astype(np.uint8)
+
+    return {
+        "fac": fac,
+        "open_min": open_min.to_numpy(dtype=np.int16),
+        "close_min": close_min.to_numpy(dtype=np.int16),
+        "closed_days": closed_days,
+    }
+
+def open_now_mask(df: pd.DataFrame, now: datetime | None = None):
+    """지금(서울 시간) 개방 중인 행. 개방시간을 알 수 없으면 False"""
+    now = now or datetime.now(ZoneInfo("Asia/Seoul"))
+    minute = now.hour * 60 + now.minute
+    fac = df["fac"].to_numpy()
+    open_min = df["open_min"].to_numpy()
+    close_min = df["close_min"].to_numpy()
+
+    in_window = np.where(
+        close_min > open_min,
+        (minute >= open_min) & (minute < close_min),
+        (minute >= open_min) | (minute < close_min),  # 익일까지 운영
+    )
+    is_open = ((fac & FAC_ALWAYS_OPEN) != 0) | ((open_min >= 0) & in_window)
+    closed_today = (df["closed_days"].to_numpy() >> now.weekday()) & 1
+    return is_open & (closed_today == 0)
+
+def filter_facilities(df: pd.DataFrame, selected: list, now: datetime | None = None) -> pd.DataFrame:
+    """선택한 조건을 모두 만족하는 행만 (AND). 비트 연산 한 번 + 필요할 때만 개방시간 계산"""
+    if not selected or df.empty:
+        return df
+    required = 0
+    for key in selected:
+        required |= FACILITY_BITS.get(key, 0)
+    mask = (df["fac"].to_numpy() & required) == required
+    if "open_now" in selected:
+        mask &= open_now_mask(df, now)
+    return df[mask]
+
+def facility_icons(mask: int) -> str:
+    return " ".join(icon for bit, icon in FACILITY_ICONS if mask & bit)
+
+def facility_labels(mask: int, txt: dict) -> str:
+    return ", ".join(txt[f"fac_{key}"] for key, bit in FACILITY_BITS.items() if mask & bit)
+
+# -----------------------------
+# Data Loading (CSV 시드 + 서울 열린데이터 API 동기화)
+# -----------------------------
+TOILET_KEY = "연번"
+
+def read_toilet_csv(file_path: str = "seoul_toilet.csv") -> pd.DataFrame:
+    """원본 CSV를 문자열 그대로 읽기 (API 응답과 같은 형태로 비교하기 위함)"""
+    df = None
     for enc in ("utf-8", "cp949", "euc-kr"):
         try:
-            df = pd.read_csv(file_path, encoding=enc)
+            df = pd.read_csv(file_path, encoding=enc, dtype=str)
             break
         except Exception:
             df = None
     if df is None:
         raise FileNotFoundError(file_path)
+    return df
 
+def normalize_toilet_frame(raw: pd.DataFrame) -> pd.DataFrame:
+    """원본(한글 컬럼) 행들을 앱에서 쓰는 컬럼으로 변환. index = 연번(id)"""
     target_cols = {
         "건물명": "name",
         "도로명주소": "addr",
         "개방시간": "hours",
         "x 좌표": "lon",
         "y 좌표": "lat",
-        "남녀공용화장실여부": "unisex",
-        "기저귀교환대장소": "diaper",
-        "비상벨설치여부": "bell",
-        "CCTV설치여부": "cctv",
     }
-    existing_cols = [c for c in target_cols if c in df.columns]
-    df = df[existing_cols].rename(columns=target_cols)
+    existing_cols = [c for c in target_cols if c in raw.columns]
+    df = raw[existing_cols].rename(columns=target_cols)
+    df.index = toilet_ids(raw)
+    for col, values in facility_columns(raw).items():
+        df[col] = values
+
+    for col in ["lat", "lon"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    for col in ["unisex", "diaper", "bell", "cctv", "addr", "hours"]:
+    for col in ["addr", "hours"]:
         if col not in df.columns:
             df[col] = "-"
         else:
             df[col] = df[col].fillna("정보없음")
 
-    for col in df.select_dtypes(include='object').columns:
+    for col in df.select_dtypes(include=["object", "string"]).columns:
         df[col] = df[col].str.replace("|", "", regex=False)
 
     if "lat" in df.columns and "lon" in df.columns:
@@ -308,6 +462,243 @@ def load_toilet_data(file_path: str = "seoul_toilet.csv") -> pd.DataFrame:
 
     return df
 
+def toilet_ids(raw: pd.DataFrame) -> pd.Index:
+    return pd.Index(pd.to_numeric(raw[TOILET_KEY]).astype("int64"), name="id")
+
+def row_fingerprints(raw: pd.DataFrame) -> dict:
+    """연번 -> 행 해시. 동기화 시 변경된 행만 골라내는 데 사용"""
+    cols = sorted(c for c in raw.columns if c != TOILET_KEY)
+    hashes = pd.util.hash_pandas_object(raw[cols].fillna("").astype(str), index=False)
+    return dict(zip(toilet_ids(raw).tolist(), hashes.tolist()))
+
+class ToiletStore:
+    """프로세스 공용 화장실 테이블.
+
+    `df`는 통째로 교체(copy-on-write)되므로 읽는 쪽은 락 없이 참조만 가져가면 되고,
+    동기화는 삽입/수정/삭제된 행만 반영한 뒤 `version`을 올린다.
+    """
+
+    def __init__(self, raw: pd.DataFrame):
+        self.lock = threading.Lock()
+        self.df = normalize_toilet_frame(raw)
+        # 원본(문자열) 행. 피드에 없는 컬럼을 같은 연번 행에서 이어받는 데 사용
+        self.raw = raw.set_axis(toilet_ids(raw))
+        self.fingerprints = row_fingerprints(raw)
+        self.version = 0
+        self.loaded_at = time.time()
+        self.last_delta = (0, 0, 0)
+        self.last_error = None
+        self.last_sync = 0.0
+        self.syncing = False
+        # (start, end) -> (validators, rows): 조건부 요청(304) 시 재사용
+        self.page_cache = {}
+        # 이름 -> fn(version, points). 델타 반영 직후(락 안에서) 바뀐 행의 좌표들로 호출
+        self.listeners = {}
+
+    def snapshot(self):
+        """(df, token) 한 쌍. token = (loaded_at, version): 재로딩되면 loaded_at, 델타마다 version이 바뀜"""
+        with self.lock:
+            return self.df, (self.loaded_at, self.version)
+
+    def diff(self, raw: pd.DataFrame):
+        new_fps = row_fingerprints(raw)
+        old_fps = self.fingerprints
+        inserted = [i for i in new_fps if i not in old_fps]
+        updated = [i for i in new_fps if i in old_fps and new_fps[i] != old_fps[i]]
+        deleted = [i for i in old_fps if i not in new_fps]
+        return inserted, updated, deleted, new_fps
+
+    def carry_over(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """피드에 없는 원본 컬럼(개방시간, 편의시설 등)은 저장된 같은 연번 행의 값으로 채움"""
+        missing = [c for c in self.raw.columns if c not in raw.columns]
+        if not missing:
+            return raw
+        kept = self.raw[missing].reindex(toilet_ids(raw))
+        return raw.assign(**{c: kept[c].to_numpy() for c in missing})
+
+    def apply_snapshot(self, raw: pd.DataFrame):
+        """전체 스냅샷을 받아 연번 기준 델타만 테이블에 반영. (삽입, 수정, 삭제) 건수 반환"""
+        with self.lock:
+            raw_ids = toilet_ids(raw)
+            # 연번이 하나도 겹치지 않으면 다른 번호 체계의 데이터 — 테이블 전체를 갈아엎지 않고 거부
+            if len(self.raw) and raw_ids.intersection(self.raw.index).empty:
+                raise ValueError(f"snapshot shares no {TOILET_KEY} with the current table (different key space?)")
+            raw = self.carry_over(raw)
+            inserted, updated, deleted, new_fps = self.diff(raw)
+            if not (inserted or updated or deleted):
+                return 0, 0, 0
+
+            changed_ids = set(inserted) | set(updated)
+            changed = normalize_toilet_frame(raw[raw_ids.isin(changed_ids)])
+
+            old = self.df[self.df.index.isin(updated + deleted)]
+            df = self.df.drop(index=updated + deleted, errors="ignore")
+            if not changed.empty:
+                df = pd.concat([df, changed])
+
+            self.df = df
+            self.raw = raw.set_axis(raw_ids)
+            self.fingerprints = new_fps
+            self.version += 1
+            self.last_delta = (len(inserted), len(updated), len(deleted))
+
+            # 수정/삭제 전 좌표 + 삽입/수정 후 좌표
+            points = list(zip(old["lat"], old["lon"])) + list(zip(changed["lat"], changed["lon"]))
+            for listener in list(self.listeners.values()):
+                listener(self.version, points)
+            return self.last_delta
+
+@st.cache_resource(show_spinner=False)
+def start_warmup(file_path: str = "seoul_toilet.csv") -> dict:
+    """프로세스당 한 번: 첫 화면을 그리는 동안 데이터셋/인덱스를 백그라운드에서 준비"""
+    state = {}
+
+    def _run():
+        try:
+            state["store"] = ToiletStore(read_toilet_csv(file_path))
+        except Exception as e:
+            state["error"] = e
+
+    state["thread"] = threading.Thread(target=_run, daemon=True)
+    state["thread"].start()
+    return state
+
+@st.cache_resource(show_spinner=False)
+def get_toilet_store(file_path: str = "seoul_toilet.csv") -> ToiletStore:
+    warm = start_warmup(file_path)
+    warm["thread"].join()
+    if "error" in warm:
+        start_warmup.clear()  # 실패는 캐시하지 않음 — 다음 rerun에서 다시 로딩
+        raise warm["error"]
+    return warm["store"]
+
+# -----------------------------
+# Seoul Open Data API
+# -----------------------------
+SEOUL_API_BASE = "http://openapi.seoul.go.kr:8088"
+SEOUL_API_SERVICE = "SearchPublicToiletPOIService"
+SEOUL_API_PAGE_SIZE = 1000  # 서울 열린데이터 API 1회 최대 건수
+SEOUL_SYNC_INTERVAL = 60 * 30
+
+# API 필드코드 -> CSV 컬럼명 (SearchPublicToiletPOIService 기준). 매핑에 없는 필드는 이름 그대로 사용하므로
+# CSV 컬럼명으로 응답하는 스텁 서버(seoul_api_stub.py)도 같은 코드로 처리됨.
+# POI_ID는 CSV의 연번과 다른 번호 체계라 연번으로 매핑하지 않음 — 이 서비스는 첫 페이지에서 거부되고,
+# 연번을 주는 데이터셋을 SEOUL_API_SERVICE로 지정해야 동기화된다. 피드에 없는 컬럼(개방시간/편의시설)은 기존 값 유지.
+SEOUL_API_FIELDS = {
+    "FNAME": "건물명",
+    "ANAME": "유형",
+    "X_WGS84": "x 좌표",
+    "Y_WGS84": "y 좌표",
+}
+
+class SeoulApiError(RuntimeError):
+    """API가 200으로 응답했지만 내용이 정상 스냅샷이 아닌 경우"""
+
+def fetch_with_retry(url: str, headers: dict, retries: int = 3, backoff: float = 0.5):
+    """5xx / 429 / 네트워크 오류는 지수 백오프로 재시도"""
+    for attempt in range(retries + 1):
+        try:
+            r = requests.get(url, headers=headers, timeout=10)
+            if r.status_code < 500 and r.status_code != 429:
+                return r
+        except requests.RequestException:
+            if attempt == retries:
+                raise
+        if attempt < retries:
+            time.sleep(backoff * (2 ** attempt))
+    r.raise_for_status()
+    return r
+
+def fetch_seoul_page(api_key: str, start: int, end: int, page_cache: dict,
+                     base_url: str = SEOUL_API_BASE, service: str = SEOUL_API_SERVICE):
+    """한 페이지 조회. 이전 ETag/Last-Modified로 조건부 요청 → 304면 캐시된 행 재사용.
+    반환: (전체건수 또는 None, rows)"""
+    url = f"{base_url.rstrip('/')}/{api_key}/json/{service}/{start}/{end}/"
+    validators, cached_rows = page_cache.get((start, end), ({}, None))
+
+    headers = {}
+    if cached_rows is not None:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    r = fetch_with_retry(url, headers)
+    if r.status_code == 304 and cached_rows is not None:
+        return None, cached_rows
+    r.raise_for_status()
+
+    payload = r.json()
+    body = payload.get(service, {})
+    # 오류도 HTTP 200 + RESULT.CODE로 옴 (서비스 블록 안 또는 최상위)
+    result = body.get("RESULT") or payload.get("RESULT") or {}
+    if result.get("CODE") != "INFO-000":
+        raise SeoulApiError(f"{start}-{end}: {result.get('CODE')} {result.get('MESSAGE', '')}".strip())
+
+    rows = [{SEOUL_API_FIELDS.get(k, k): v for k, v in row.items()} for row in body.get("row", [])]
+    page_cache[(start, end)] = (
+        {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")},
+        rows,
+    )
+    return body.get("list_total_count"), rows
+
+def fetch_seoul_toilets(api_key: str, page_cache: dict, base_url: str = SEOUL_API_BASE,
+                        service: str = SEOUL_API_SERVICE, page_size: int = SEOUL_API_PAGE_SIZE,
+                        max_workers: int = 4) -> pd.DataFrame:
+    """첫 페이지로 전체 건수를 확인한 뒤 나머지 페이지는 동시에 받아 하나의 원본 프레임으로 합침"""
+    first_total, first_rows = fetch_seoul_page(api_key, 1, page_size, page_cache, base_url, service)
+    if first_rows and TOILET_KEY not in first_rows[0]:
+        # 나머지 페이지를 받기 전에 거부 (연번이 없는 피드는 델타를 계산할 수 없음)
+        raise SeoulApiError(f"no {TOILET_KEY} column in response (check SEOUL_API_FIELDS / SEOUL_API_SERVICE)")
+    total = first_total if first_total is not None else page_cache.get("total", len(first_rows))
+    page_cache["total"] = total
+
+    ranges = [(s, min(s + page_size - 1, total)) for s in range(page_size + 1, total + 1, page_size)]
+    rows = list(first_rows)
+    if ranges:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pages = pool.map(
+                lambda rg: fetch_seoul_page(api_key, rg[0], rg[1], page_cache, base_url, service)[1],
+                ranges,
+            )
+            for page_rows in pages:
+                rows.extend(page_rows)
+
+    # 일부 페이지라도 빠지면 그 행들이 삭제로 계산되므로, 건수가 정확히 맞을 때만 스냅샷으로 인정
+    if not rows or len(rows) != total:
+        raise SeoulApiError(f"incomplete snapshot: {len(rows)} rows, list_total_count={total}")
+    raw = pd.DataFrame(rows, dtype=str)
+    if TOILET_KEY not in raw.columns:
+        raise SeoulApiError(f"no {TOILET_KEY} column in response (check SEOUL_API_FIELDS / SEOUL_API_SERVICE)")
+    return raw.drop_duplicates(subset=TOILET_KEY, keep="last")
+
+def sync_toilet_store(store: ToiletStore, api_key: str, base_url: str = SEOUL_API_BASE,
+                      service: str = SEOUL_API_SERVICE, page_size: int = SEOUL_API_PAGE_SIZE):
+    try:
+        raw = fetch_seoul_toilets(api_key, store.page_cache, base_url, service, page_size)
+        store.apply_snapshot(raw)
+        store.last_error = None
+    except Exception as e:
+        # 동기화 실패 시 기존 테이블 유지
+        store.last_error = f"{datetime.now():%Y-%m-%d %H:%M:%S} {type(e).__name__}: {e}"
+        log.warning("toilet sync failed: %s", e)
+    finally:
+        store.last_sync = time.time()
+        store.syncing = False
+
+def start_background_sync(store: ToiletStore, api_key: str, base_url: str = SEOUL_API_BASE,
+                          service: str = SEOUL_API_SERVICE, interval: int = SEOUL_SYNC_INTERVAL):
+    """마지막 동기화 후 interval이 지났으면 백그라운드 스레드로 동기화 (화면 렌더링은 기다리지 않음)"""
+    if not api_key:
+        return
+    with store.lock:
+        if store.syncing or time.time() - store.last_sync < interval:
+            return
+        store.syncing = True
+    threading.Thread(
+        target=sync_toilet_store, args=(store, api_key, base_url, service), daemon=True
+    ).start()
+
 @st.cache_data(show_spinner=False)
 def load_sample_extra_data():
     subway_data = [
@@ -334,7 +725,7 @@ def load_sample_extra_data():
 # -----------------------------
 @st.cache_data(show_spinner=False)
 def geocode_address(raw_address: str):
-    geolocator = Nominatim(user_agent="seoul_toilet_finder_v5", timeout=10)
+    geolocator = geopy_geocoders.Nominatim(user_agent="seoul_toilet_finder_v5", timeout=10)
     search_query = f"Seoul {raw_address}" if "Seoul" not in raw_address and "서울" not in raw_address else raw_address
     loc = geolocator.geocode(search_query)
     if not loc:
@@ -342,13 +733,159 @@ def geocode_address(raw_address: str):
     return float(loc.latitude), float(loc.longitude), loc.address
 
 def add_distance(df: pd.DataFrame, user_lat: float, user_lon: float) -> pd.DataFrame:
-    def _dist(row):
-        return geodesic((user_lat, user_lon), (row["lat"], row["lon"])).km
-
     out = df.copy()
-    out["dist"] = out.apply(_dist, axis=1)
+    out["dist"] = [
+        geopy_distance.geodesic((user_lat, user_lon), (lat, lon)).km
+        for lat, lon in zip(out["lat"], out["lon"])
+    ]
     return out
 
+def haversine_km(lat: float, lon: float, lats, lons):
+    """벡터화된 구면 거리(km). 후보 추리기용 — 최종 거리는 add_distance(geodesic)로 계산"""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0088 * 2 * np.arcsin(np.sqrt(a))
+
+# -----------------------------
+# Nearby query cache (세션 공용)
+# -----------------------------
+GRID_CELL_DEG = 0.002  # 약 220m x 180m
+RADIUS_BUCKETS_KM = (0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 5.0)
+
+class NearbyCache:
+    """격자 셀 + 반경 버킷 단위로 정렬된 결과 id를 저장하는 LRU 캐시.
+
+    token = (loaded_at, version). 데이터가 새로 로딩되면(loaded_at 증가) 해당 종류를 모두 버리고,
+    델타 동기화(version 증가)는 evict_points()로 바뀐 좌표가 닿는 항목만 버린다.
+    현재보다 오래된 스냅샷으로 들어온 조회는 캐시를 건드리지 않고 바로 계산한다.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_ids: int = 500_000):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # (kind, cell, bucket) -> (ids, center_lat, center_lon, reach_km)
+        self.tokens = {}
+        self.max_entries = max_entries
+        self.max_ids = max_ids
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.delta_evictions = 0
+        self.invalidations = 0
+
+    def _drop(self, keys):
+        for k in keys:
+            self.size -= len(self.entries.pop(k)[0])
+
+    def _accept_token(self, kind: str, token) -> bool:
+        """이 token으로 캐시를 읽고 써도 되는지. 더 새 token이면 그에 맞춰 캐시를 갱신"""
+        current = self.tokens.get(kind)
+        if current == token:
+            return True
+        if current is not None and token < current:
+            return False
+        if current is not None and (token[0] != current[0] or token[1] > current[1]):
+            # 재로딩됐거나, evict_points로 전달되지 않은 델타가 있음
+            self._drop([k for k in self.entries if k[0] == kind])
+            self.invalidations += 1
+        self.tokens[kind] = token
+        return True
+
+    def evict_points(self, kind: str, loaded_at, version: int, points: list):
+        """델타 동기화 후 호출: 바뀐 행 좌표가 (셀 중심, reach) 범위에 드는 항목만 제거.
+        중간 델타를 놓쳤으면(version이 1씩 이어지지 않으면) 해당 종류를 모두 버린다."""
+        with self.lock:
+            current = self.tokens.get(kind)
+            if current is None or current[0] != loaded_at or version <= current[1]:
+                return
+            if version != current[1] + 1:
+                self._drop([k for k in self.entries if k[0] == kind])
+                self.invalidations += 1
+            elif points:
+                lats = np.array([p[0] for p in points], dtype=float)
+                lons = np.array([p[1] for p in points], dtype=float)
+                stale = [
+                    k for k, (_, c_lat, c_lon, reach) in self.entries.items()
+                    if k[0] == kind and bool((haversine_km(c_lat, c_lon, lats, lons) <= reach).any())
+                ]
+                self._drop(stale)
+                self.delta_evictions += len(stale)
+            self.tokens[kind] = (loaded_at, version)
+
+    def get_or_compute(self, kind: str, token, key: tuple, center: tuple, reach_km: float, compute):
+        full_key = (kind,) + key
+        with self.lock:
+            if not self._accept_token(kind, token):
+                self.misses += 1
+                cacheable = False
+            else:
+                cacheable = True
+                entry = self.entries.get(full_key)
+                if entry is not None:
+                    self.entries.move_to_end(full_key)
+                    self.hits += 1
+                    return entry[0]
+                self.misses += 1
+
+        ids = compute()
+
+        with self.lock:
+            if cacheable and self.tokens.get(kind) == token and full_key not in self.entries:
+                self.entries[full_key] = (ids, center[0], center[1], reach_km)
+                self.size += len(ids)
+                while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_ids):
+                    _, old = self.entries.popitem(last=False)
+                    self.size -= len(old[0])
+                    self.evictions += 1
+        return ids
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "ids": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "evictions": self.evictions,
+                "delta_evictions": self.delta_evictions,
+                "invalidations": self.invalidations,
+            }
+
+@st.cache_resource(show_spinner=False)
+def get_nearby_cache() -> NearbyCache:
+    return NearbyCache()
+
+def snap_query(lat: float, lon: float, radius_km: float):
+    cell = (math.floor(lat / GRID_CELL_DEG), math.floor(lon / GRID_CELL_DEG))
+    bucket = next((b for b in RADIUS_BUCKETS_KM if b >= radius_km), radius_km)
+    return cell, bucket
+
+def rank_within(df: pd.DataFrame, lat: float, lon: float, reach_km: float) -> list:
+    if df.empty:
+        return []
+    d = haversine_km(lat, lon, df["lat"].to_numpy(), df["lon"].to_numpy())
+    mask = d <= reach_km
+    order = np.argsort(d[mask], kind="stable")
+    return df.index[mask][order].tolist()
+
+def find_nearby(df: pd.DataFrame, kind: str, token, user_lat: float, user_lon: float,
+                radius_km: float, cache: NearbyCache) -> pd.DataFrame:
+    """셀 중심 기준 (버킷 반경 + 셀 반대각선) 안의 후보 id를 캐시에서 가져온 뒤,
+    실제 위치/반경으로 정확한 거리 계산·필터·정렬"""
+    cell, bucket = snap_query(user_lat, user_lon, radius_km)
+    c_lat, c_lon = (cell[0] + 0.5) * GRID_CELL_DEG, (cell[1] + 0.5) * GRID_CELL_DEG
+    half_diag = float(haversine_km(c_lat, c_lon, c_lat + GRID_CELL_DEG / 2, c_lon + GRID_CELL_DEG / 2))
+    reach = (bucket + half_diag) * 1.01  # 구면/타원체 거리 차이 여유
+
+    ids = cache.get_or_compute(
+        kind, token, (cell, bucket), (c_lat, c_lon), reach, lambda: rank_within(df, c_lat, c_lon, reach)
+    )
+    out = add_distance(df.loc[ids], user_lat, user_lon)
+    return out[out["dist"] <= radius_km].sort_values("dist", kind="stable")
+
 # -----------------------------
 # Naver Map Route Link
 # -----------------------------
@@ -402,15 +939,20 @@ def save_feedback(fb_type: str, message: str, file_name: str = "user_feedback.cs
 # -----------------------------
 # AI
 # -----------------------------
+@st.cache_resource(show_spinner=False)
+def get_openai_client(api_key: str):
+    return openai.OpenAI(api_key=api_key)
+
 def ask_ai_recommendation(df_nearby: pd.DataFrame, user_query: str, api_key: str) -> str:
     if not api_key:
         return "⚠️ API Key가 설정되지 않았습니다. (Secrets를 확인해주세요)"
     if df_nearby is None or df_nearby.empty:
         return "주변에 검색된 화장실 데이터가 없어 추천할 수 없어요."
 
-    cols = ["name", "dist", "unisex", "diaper", "bell", "cctv"]
+    cols = ["name", "dist", "hours"]
     df_slim = df_nearby[cols].head(15).copy()
     df_slim["dist"] = df_slim["dist"].round(2)
+    df_slim["facilities"] = [facility_labels(int(m), LANG["ko"]) or "정보없음" for m in df_nearby["fac"].head(15)]
     data_context = df_slim.to_csv(index=False)
 
     system = (
@@ -429,7 +971,7 @@ def ask_ai_recommendation(df_nearby: pd.DataFrame, user_query: str, api_key: str
 """
 
     try:
-        client = openai.OpenAI(api_key=api_key)
+        client = get_openai_client(api_key)
         resp = client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
@@ -445,21 +987,64 @@ def ask_ai_recommendation(df_nearby: pd.DataFrame, user_query: str, api_key: str
 # -----------------------------
 # Map helpers
 # -----------------------------
-def facility_icons(row: pd.Series) -> str:
-    icons = ""
-    if str(row.get("diaper", "-")) not in ("-", "정보없음", "nan"):
-        icons += "👶 "
-    bell = str(row.get("bell", ""))
-    cctv = str(row.get("cctv", ""))
-    unisex = str(row.get("unisex", ""))
-
-    if bell == "Y" or "설치" in bell:
-        icons += "🚨 "
-    if cctv == "Y" or "설치" in cctv:
-        icons += "📷 "
-    if unisex == "Y":
-        icons += "👫"
-    return icons.strip()
+def toilet_popup(r, user_lat: float, user_lon: float, txt: dict):
+    route_url = naver_route_link(
+        user_lat=user_lat,
+        user_lon=user_lon,
+        dest_lat=r["lat"],
+        dest_lon=r["lon"],
+        dest_name=r["name"],
+        mode="walk",
+    )
+
+    web_url = f"https://map.naver.com/v5/search/{quote(str(r['name']))}"
+
+    popup_html = f"""
+    <div style="font-family:Pretendard, sans-serif; font-size:14px;">
+      <div style="font-weight:900; margin-bottom:6px;">🚻 {r['name']}</div>
+      <div style="color:#666; margin-bottom:10px;">약 {float(r['dist']):.2f} km</div>
+
+      <div style="display:flex; gap:8px; flex-wrap:wrap;">
+        <a href="{web_url}" onclick="
+            try {{
+              var ifr = document.createElement('iframe');
+              ifr.style.display = 'none';
+              ifr.src = '{route_url}';
+              document.body.appendChild(ifr);
+              setTimeout(function(){{}}, 1200);
+            }} catch(e) {{}}
+          " style="text-decoration:none;">
+          <span style="background:#2962FF; color:white; padding:6px 10px; border-radius:8px; font-weight:800;">
+            {txt['route_try']}
+          </span>
+        </a>
+
+        <a href="{web_url}" target="_blank" style="text-decoration:none;">
+          <span style="background:#E3F2FD; color:#0D47A1; padding:6px 10px; border-radius:8px; font-weight:800; border:1px solid #90CAF9;">
+            {txt['search_web']}
+          </span>
+        </a>
+      </div>
+
+      <div style="margin-top:8px; font-size:12px; color:#7a7a7a;">
+        {txt['route_note']}
+      </div>
+    </div>
+    """
+
+    return folium.Popup(folium.IFrame(html=popup_html, width=300, height=165), max_width=340)
+
+def selected_marker_group(r, user_lat: float, user_lon: float, txt: dict):
+    """선택된 시설 강조용 레이어. 기본 지도 JS와 분리해 st_folium(feature_group_to_add=...)로 넘기므로
+    선택이 바뀌어도 지도 컴포넌트가 다시 마운트되지 않음 (열린 팝업/이동·확대 상태 유지)"""
+    group = folium.FeatureGroup(name="selected")
+    folium.Marker(
+        [r["lat"], r["lon"]],
+        tooltip=r["name"],
+        popup=toilet_popup(r, user_lat, user_lon, txt),
+        icon=folium.Icon(color="green", icon="star"),
+    ).add_to(group)
+    return group
 
 def build_map(
     user_lat: float,
@@ -471,7 +1056,6 @@ def build_map(
     show_toilet: bool,
     show_subway: bool,
     show_store: bool,
-    selected_name: str | None,
 ):
     m = folium.Map(location=[user_lat, user_lon], zoom_start=15, tiles="CartoDB positron")
 
@@ -481,72 +1065,16 @@ def build_map(
         icon=folium.Icon(color="red", icon="user"),
     ).add_to(m)
 
-    marker_cluster = MarkerCluster().add_to(m)
+    marker_cluster = folium_plugins.MarkerCluster().add_to(m)
 
     if show_toilet and nearby_toilet is not None and not nearby_toilet.empty:
         for _, r in nearby_toilet.iterrows():
-            is_selected = (selected_name is not None and r["name"] == selected_name)
-
-            route_url = naver_route_link(
-                user_lat=user_lat,
-                user_lon=user_lon,
-                dest_lat=r["lat"],
-                dest_lon=r["lon"],
-                dest_name=r["name"],
-                mode="walk",
-            )
-
-            web_url = f"https://map.naver.com/v5/search/{quote(str(r['name']))}"
-
-            popup_html = f"""
-            <div style="font-family:Pretendard, sans-serif; font-size:14px;">
-              <div style="font-weight:900; margin-bottom:6px;">🚻 {r['name']}</div>
-              <div style="color:#666; margin-bottom:10px;">약 {float(r['dist']):.2f} km</div>
-
-              <div style="display:flex; gap:8px; flex-wrap:wrap;">
-                <a href="{web_url}" onclick="
-                    try {{
-                      var ifr = document.createElement('iframe');
-                      ifr.style.display = 'none';
-                      ifr.src = '{route_url}';
-                      document.body.appendChild(ifr);
-                      setTimeout(function(){{}}, 1200);
-                    }} catch(e) {{}}
-                  " style="text-decoration:none;">
-                  <span style="background:#2962FF; color:white; padding:6px 10px; border-radius:8px; font-weight:800;">
-                    {txt['route_try']}
-                  </span>
-                </a>
-
-                <a href="{web_url}" target="_blank" style="text-decoration:none;">
-                  <span style="background:#E3F2FD; color:#0D47A1; padding:6px 10px; border-radius:8px; font-weight:800; border:1px solid #90CAF9;">
-                    {txt['search_web']}
-                  </span>
-                </a>
-              </div>
-
-              <div style="margin-top:8px; font-size:12px; color:#7a7a7a;">
-                {txt['route_note']}
-              </div>
-            </div>
-            """
-
-            popup = folium.Popup(folium.IFrame(html=popup_html, width=300, height=165), max_width=340)
-
-            if is_selected:
-                folium.Marker(
-                    [r["lat"], r["lon"]],
-                    tooltip=r["name"],
-                    popup=popup,
-                    icon=folium.Icon(color="green", icon="star"),
-                ).add_to(m)
-            else:
-                folium.Marker(
-                    [r["lat"], r["lon"]],
-                    tooltip=r["name"],
-                    popup=popup,
-                    icon=folium.Icon(color="green", icon="info-sign"),
-                ).add_to(marker_cluster)
+            folium.Marker(
+                [r["lat"], r["lon"]],
+                tooltip=r["name"],
+                popup=toilet_popup(r, user_lat, user_lon, txt),
+                icon=folium.Icon(color="green", icon="info-sign"),
+            ).add_to(marker_cluster)
 
     if show_subway and nearby_subway is not None and not nearby_subway.empty:
         for _, r in nearby_subway.iterrows():
@@ -580,6 +1108,11 @@ def sidebar_ui(txt: dict):
         show_toilet = st.checkbox(txt["show_toilet"], value=True)
         show_subway = st.checkbox(txt["show_subway"], value=True)
         show_store = st.checkbox(txt["show_store"], value=False)
+        facility_filter = st.multiselect(
+            txt["filter_label"],
+            list(FACILITY_BITS) + ["open_now"],
+            format_func=lambda key: txt[f"fac_{key}"],
+        )
 
         st.divider()
         default_val = "서울시청" if st.session_state.lang == "ko" else "Seoul City Hall"
@@ -593,13 +1126,247 @@ def sidebar_ui(txt: dict):
                 st.dataframe(pd.read_csv("user_feedback.csv"))
             else:
                 st.caption(txt["no_feedback"])
-
-    return user_address, search_radius, show_toilet, show_subway, show_store
+            st.write("Import report:")
+            st.dataframe(import_report(), hide_index=True)
+            st.write("Tab render (ms):")
+            st.json(st.session_state.get("tab_ms", {}))
+            st.write("Nearby cache:")
+            st.json(get_nearby_cache().stats())
+            try:
+                store = get_toilet_store()
+                st.write("Sync:")
+                st.json({
+                    "version": store.version,
+                    "last_delta (ins, upd, del)": list(store.last_delta),
+                    "last_sync": datetime.fromtimestamp(store.last_sync).strftime("%Y-%m-%d %H:%M:%S")
+                    if store.last_sync else None,
+                    "last_error": store.last_error,
+                })
+            except Exception:
+                st.caption(txt["error_file"])
+
+    return user_address, search_radius, show_toilet, show_subway, show_store, facility_filter
 
 def top_header(txt: dict):
     st.markdown(APP_TITLE_HTML, unsafe_allow_html=True)
     st.caption(txt["desc"])
 
+# -----------------------------
+# Tabs (각 탭은 독립적으로 rerun 되는 fragment)
+# -----------------------------
+def coord_key(lat: float, lon: float) -> tuple:
+    return round(float(lat), 6), round(float(lon), 6)
+
+def select_from_map_click(q: dict, clicked: dict | None) -> bool:
+    """지도에서 클릭된 마커의 좌표 -> 연번(id)으로 선택 변경. 변경됐으면 True"""
+    if not clicked:
+        return False
+    toilet_id = q["toilet_by_coord"].get(coord_key(clicked["lat"], clicked["lng"]))
+    if toilet_id is None or toilet_id == st.session_state.get("selected_id"):
+        return False
+    st.session_state.selected_id = toilet_id
+    return True
+
+def on_map_click():
+    """st_folium on_change: 실제 클릭이 있을 때만 호출되고, 지도 fragment rerun 전에 실행됨"""
+    value = st.session_state.get("toilet_map") or {}
+    select_from_map_click(st.session_state.query, value.get("last_object_clicked"))
+
+def selected_toilet(q: dict):
+    """현재 선택된 시설 행 (nearby 결과의 연번 인덱스로 바로 조회). 없으면 None"""
+    selected_id = st.session_state.get("selected_id")
+    nearby_toilet = q["nearby_toilet"]
+    if selected_id is None or selected_id not in nearby_toilet.index:
+        return None
+    return nearby_toilet.loc[selected_id]
+
+def detail_card(row, txt: dict):
+    st.markdown(
+        f"""
+        <div class="card">
+            <h4 style="color:#2962FF; margin-top:0;">{row['name']}</h4>
+            <p style="margin-bottom:8px;"><b>📍 {txt['col_addr']}</b><br>{row.get('addr','-')}</p>
+            <p style="margin-bottom:0px;"><b>⏰ {txt['col_time']}</b><br>{row.get('hours','-')}</p>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+    fac = int(row["fac"])
+    icons = facility_icons(fac)
+    if icons:
+        st.info(f"**{txt['facility']}:** {icons}")
+
+    with st.expander(txt["detail_title"]):
+        for key, bit in FACILITY_BITS.items():
+            st.write(f"- {txt[f'fac_{key}']}: {'✅' if fac & bit else '—'}")
+
+def tab_fragment(func):
+    """st.fragment + 탭 본문 실행 시간 기록 (fragment rerun 비용, Admin Mode에서 확인)"""
+    @functools.wraps(func)
+    def run():
+        start = time.perf_counter()
+        try:
+            func()
+        finally:
+            timings = st.session_state.setdefault("tab_ms", {})
+            timings[func.__name__] = round((time.perf_counter() - start) * 1000, 1)
+
+    return st.fragment(run)
+
+def keep_widget(key: str):
+    """선택되지 않은 탭의 위젯은 그려지지 않아 값이 지워지므로, 별도 키에 복사해 둠"""
+    st.session_state[f"_{key}"] = st.session_state[key]
+
+def restore_widget(key: str, default):
+    if key not in st.session_state:
+        st.session_state[key] = st.session_state.get(f"_{key}", default)
+
+@tab_fragment
+def map_tab():
+    q = st.session_state.query
+    txt = LANG[st.session_state.lang]
+    m = build_map(
+        user_lat=q["user_lat"],
+        user_lon=q["user_lon"],
+        txt=txt,
+        nearby_toilet=q["nearby_toilet"],
+        nearby_subway=q["nearby_subway"],
+        nearby_store=q["nearby_store"],
+        show_toilet=q["show_toilet"],
+        show_subway=q["show_subway"],
+        show_store=q["show_store"],
+    )
+    row = selected_toilet(q)
+    highlight = (
+        selected_marker_group(row, q["user_lat"], q["user_lon"], txt)
+        if row is not None and q["show_toilet"]
+        else None
+    )
+    # 마커 클릭 때만 rerun (이동/확대로는 rerun 하지 않음). 선택은 on_map_click에서 먼저 반영됨
+    streamlit_folium.st_folium(
+        m,
+        key="toilet_map",
+        width=1100,
+        height=560,
+        returned_objects=["last_object_clicked"],
+        feature_group_to_add=highlight,
+        on_change=on_map_click,
+    )
+
+    if row is not None:
+        detail_card(row, txt)
+
+@tab_fragment
+def list_tab():
+    nearby_toilet = st.session_state.query["nearby_toilet"]
+    txt = LANG[st.session_state.lang]
+    if nearby_toilet.empty:
+        st.warning(txt["warn_no_result"])
+        return
+
+    left, right = st.columns([1, 1])
+    with left:
+        restore_widget("list_search", "")
+        search_keyword = st.text_input(
+            "🔍 " + txt["search_placeholder"], key="list_search", on_change=keep_widget, args=("list_search",)
+        )
+        filtered = (
+            nearby_toilet[nearby_toilet["name"].str.contains(search_keyword, na=False)]
+            if search_keyword
+            else nearby_toilet
+        )
+
+        if filtered.empty:
+            st.warning(txt["warn_no_result"])
+        else:
+            # 이름이 같은 건물도 구분되도록 연번(id)으로 선택
+            current = st.session_state.get("selected_id")
+            st.session_state.selected_id = st.selectbox(
+                txt["select_label"],
+                filtered.index.tolist(),
+                index=filtered.index.get_loc(current) if current in filtered.index else 0,
+                format_func=lambda i: f"{filtered.at[i, 'name']} · {filtered.at[i, 'dist']:.2f} km",
+            )
+
+    with right:
+        row = selected_toilet(st.session_state.query)
+        if not filtered.empty and row is not None:
+            detail_card(row, txt)
+
+    st.markdown("#### Nearby Results")
+    st.dataframe(
+        filtered[["name", "dist", "addr", "hours"]].assign(dist=lambda d: d["dist"].round(2)),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+@tab_fragment
+def ai_tab():
+    q = st.session_state.query
+    txt = LANG[st.session_state.lang]
+    if q["nearby_toilet"].empty:
+        st.warning(txt["warn_no_result"])
+        return
+
+    st.markdown(
+        f"""
+        <div class="info-box">
+            <h3 style="margin-top:0; color:#0D47A1;">{txt['ai_title']}</h3>
+            <p style="margin-bottom:0;">{txt['ai_desc']}</p>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+    restore_widget("ai_question", "")
+    with st.form("ai_form"):
+        user_question = st.text_input(txt["question_label"], placeholder=txt["ai_placeholder"], key="ai_question")
+        submitted = st.form_submit_button(txt["ai_btn"])
+        if submitted and user_question:
+            keep_widget("ai_question")
+            if not q["openai_api_key"]:
+                st.warning(txt["ai_need_key"])
+            else:
+                with st.spinner(txt["ai_thinking"]):
+                    ans = ask_ai_recommendation(q["nearby_toilet"], user_question, q["openai_api_key"])
+                st.session_state.ai_answer = (q["user_address"], ans)
+
+        # 마지막 답변은 탭을 옮겼다 와도 유지 (검색 위치가 바뀌면 숨김)
+        answer = st.session_state.get("ai_answer")
+        if answer and answer[0] == q["user_address"]:
+            st.info(answer[1])
+
+@tab_fragment
+def vlog_tab():
+    q = st.session_state.query
+    txt = LANG[st.session_state.lang]
+    if not q["youtube_api_key"]:
+        st.warning(txt["youtube_need_key"])
+        return
+
+    query = f"{q['user_address']} 맛집 핫플"
+    with st.spinner(txt["finding_vlogs"]):
+        urls = search_youtube_videos(query, q["youtube_api_key"], max_results=3)
+    if urls:
+        cols = st.columns(len(urls))
+        for i, url in enumerate(urls):
+            with cols[i]:
+                st.video(url)
+        st.caption(f"👀 '{query}' 검색 결과")
+    else:
+        st.caption("관련 영상을 찾을 수 없습니다.")
+
+@tab_fragment
+def feedback_tab():
+    txt = LANG[st.session_state.lang]
+    st.subheader(txt["fb_title"])
+    with st.form("feedback_form"):
+        fb_type = st.selectbox(txt["fb_type"], txt["fb_types"])
+        fb_msg = st.text_area(txt["fb_msg"])
+        sent = st.form_submit_button(txt["fb_btn"])
+        if sent:
+            save_feedback(fb_type, fb_msg)
+            st.success(txt["fb_success"])
+
 # -----------------------------
 # Main
 # -----------------------------
@@ -608,20 +1375,16 @@ def main():
     if "lang" not in st.session_state:
         st.session_state.lang = "ko"
 
+    # 데이터셋 로딩은 백그라운드로 시작하고, 그동안 화면/지오코딩을 먼저 처리
+    start_warmup()
+
     inject_css()
     txt = LANG[st.session_state.lang]
+    youtube_api_key, openai_api_key, seoul_api_key = get_api_keys()
 
-    user_address, search_radius, show_toilet, show_subway, show_store = sidebar_ui(txt)
+    user_address, search_radius, show_toilet, show_subway, show_store, facility_filter = sidebar_ui(txt)
     top_header(txt)
 
-    try:
-        df_toilet = load_toilet_data()
-    except Exception:
-        st.warning(txt["error_file"])
-        st.stop()
-
-    df_subway, df_store = load_sample_extra_data()
-
     if not user_address:
         st.info("사이드바에서 위치를 입력해 주세요.")
         st.stop()
@@ -631,20 +1394,56 @@ def main():
         st.error(txt["error_no_loc"])
         st.stop()
 
+    try:
+        store = get_toilet_store()
+    except Exception:
+        st.warning(txt["error_file"])
+        st.stop()
+
+    cache = get_nearby_cache()
+    store.listeners["nearby_cache"] = functools.partial(cache.evict_points, "toilet", store.loaded_at)
+    start_background_sync(
+        store,
+        seoul_api_key,
+        base_url=get_secret("SEOUL_API_BASE") or SEOUL_API_BASE,
+        service=get_secret("SEOUL_API_SERVICE") or SEOUL_API_SERVICE,
+    )
+    df_toilet, toilet_token = store.snapshot()
+
+    df_subway, df_store = load_sample_extra_data()
+
     user_lat, user_lon, full_addr = loc
     st.markdown(
         f'<div class="location-box">{txt["success_loc"].format(full_addr)}</div>',
         unsafe_allow_html=True,
     )
 
-    df_toilet_d = add_distance(df_toilet, user_lat, user_lon)
-    nearby_toilet = df_toilet_d[df_toilet_d["dist"] <= search_radius].sort_values("dist")
-
-    df_subway_d = add_distance(df_subway, user_lat, user_lon)
-    nearby_subway = df_subway_d[df_subway_d["dist"] <= search_radius].sort_values("dist")
-
-    df_store_d = add_distance(df_store, user_lat, user_lon)
-    nearby_store = df_store_d[df_store_d["dist"] <= search_radius].sort_values("dist")
+    nearby_toilet = find_nearby(df_toilet, "toilet", toilet_token, user_lat, user_lon, search_radius, cache)
+    nearby_toilet = filter_facilities(nearby_toilet, facility_filter)
+    nearby_subway = find_nearby(df_subway, "subway", (0.0, 0), user_lat, user_lon, search_radius, cache)
+    nearby_store = find_nearby(df_store, "store", (0.0, 0), user_lat, user_lon, search_radius, cache)
+
+    # 탭 fragment들이 공유하는 상태. 전체 rerun 때만 갱신되고, fragment rerun은 이 값을 읽기만 함
+    st.session_state.query = {
+        "user_address": user_address,
+        "user_lat": user_lat,
+        "user_lon": user_lon,
+        "nearby_toilet": nearby_toilet,
+        # 지도 클릭 좌표 -> 연번. 좌표가 겹치면 가까운 시설이 남도록 먼 쪽부터 채움
+        "toilet_by_coord": {
+            coord_key(lat, lon): toilet_id
+            for toilet_id, lat, lon in zip(
+                nearby_toilet.index[::-1], nearby_toilet["lat"][::-1], nearby_toilet["lon"][::-1]
+            )
+        },
+        "nearby_subway": nearby_subway,
+        "nearby_store": nearby_store,
+        "show_toilet": show_toilet,
+        "show_subway": show_subway,
+        "show_store": show_store,
+        "youtube_api_key": youtube_api_key,
+        "openai_api_key": openai_api_key,
+    }
 
     st.markdown("---")
     m1, m2, m3 = st.columns(3)
@@ -657,124 +1456,16 @@ def main():
         st.metric(label=txt["metric_nearest"], value=nearest)
     st.markdown("---")
 
-    tab_map, tab_list, tab_ai, tab_vlog, tab_feedback = st.tabs(
-        [txt["tab_map"], txt["tab_list"], txt["tab_ai"], txt["tab_vlog"], txt["tab_feedback"]]
+    # on_change="rerun": 선택된 탭만 실행 (나머지 탭은 열릴 때까지 아무것도 계산하지 않음)
+    tabs = st.tabs(
+        [txt["tab_map"], txt["tab_list"], txt["tab_ai"], txt["tab_vlog"], txt["tab_feedback"]],
+        key="main_tabs",
+        on_change="rerun",
     )
-
-    selected_name = None
-    selected_row = None
-
-    with tab_list:
-        if nearby_toilet.empty:
-            st.warning(txt["warn_no_result"])
-        else:
-            left, right = st.columns([1, 1])
-            with left:
-                search_keyword = st.text_input("🔍 " + txt["search_placeholder"])
-                filtered = (
-                    nearby_toilet[nearby_toilet["name"].str.contains(search_keyword, na=False)]
-                    if search_keyword
-                    else nearby_toilet
-                )
-
-                if filtered.empty:
-                    st.warning(txt["warn_no_result"])
-                else:
-                    selected_name = st.selectbox(txt["select_label"], filtered["name"].tolist())
-                    selected_row = filtered[filtered["name"] == selected_name].iloc[0]
-
-            with right:
-                if selected_row is not None:
-                    st.markdown(
-                        f"""
-                        <div class="card">
-                            <h4 style="color:#2962FF; margin-top:0;">{selected_row['name']}</h4>
-                            <p style="margin-bottom:8px;"><b>📍 {txt['col_addr']}</b><br>{selected_row.get('addr','-')}</p>
-                            <p style="margin-bottom:0px;"><b>⏰ {txt['col_time']}</b><br>{selected_row.get('hours','-')}</p>
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-                    icons = facility_icons(selected_row)
-                    if icons:
-                        st.info(f"**{txt['facility']}:** {icons}")
-
-                    with st.expander(txt["detail_title"]):
-                        st.write(f"- 기저귀교환대: {selected_row.get('diaper','-')}")
-                        st.write(f"- 안전시설: 비상벨({selected_row.get('bell','-')}), CCTV({selected_row.get('cctv','-')})")
-                        st.write(f"- 남녀공용: {selected_row.get('unisex','-')}")
-
-            st.markdown("#### Nearby Results")
-            st.dataframe(
-                filtered[["name", "dist", "addr", "hours"]].assign(dist=lambda d: d["dist"].round(2)),
-                use_container_width=True,
-                hide_index=True,
-            )
-
-    with tab_map:
-        m = build_map(
-            user_lat=user_lat,
-            user_lon=user_lon,
-            txt=txt,
-            nearby_toilet=nearby_toilet,
-            nearby_subway=nearby_subway,
-            nearby_store=nearby_store,
-            show_toilet=show_toilet,
-            show_subway=show_subway,
-            show_store=show_store,
-            selected_name=selected_name,
-        )
-        st_folium(m, width=1100, height=560)
-
-    with tab_ai:
-        if nearby_toilet.empty:
-            st.warning(txt["warn_no_result"])
-        else:
-            st.markdown(
-                f"""
-                <div class="info-box">
-                    <h3 style="margin-top:0; color:#0D47A1;">{txt['ai_title']}</h3>
-                    <p style="margin-bottom:0;">{txt['ai_desc']}</p>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-            with st.form("ai_form"):
-                user_question = st.text_input(txt["question_label"], placeholder=txt["ai_placeholder"])
-                submitted = st.form_submit_button(txt["ai_btn"])
-                if submitted and user_question:
-                    if not OPENAI_API_KEY:
-                        st.warning(txt["ai_need_key"])
-                    else:
-                        with st.spinner(txt["ai_thinking"]):
-                            ans = ask_ai_recommendation(nearby_toilet, user_question, OPENAI_API_KEY)
-                            st.info(ans)
-
-    with tab_vlog:
-        if not YOUTUBE_API_KEY:
-            st.warning(txt["youtube_need_key"])
-        else:
-            query = f"{user_address} 맛집 핫플"
-            with st.spinner(txt["finding_vlogs"]):
-                urls = search_youtube_videos(query, YOUTUBE_API_KEY, max_results=3)
-            if urls:
-                cols = st.columns(len(urls))
-                for i, url in enumerate(urls):
-                    with cols[i]:
-                        st.video(url)
-                st.caption(f"👀 '{query}' 검색 결과")
-            else:
-                st.caption("관련 영상을 찾을 수 없습니다.")
-
-    with tab_feedback:
-        st.subheader(txt["fb_title"])
-        with st.form("feedback_form"):
-            fb_type = st.selectbox(txt["fb_type"], txt["fb_types"])
-            fb_msg = st.text_area(txt["fb_msg"])
-            sent = st.form_submit_button(txt["fb_btn"])
-            if sent:
-                save_feedback(fb_type, fb_msg)
-                st.success(txt["fb_success"])
+    for tab, render in zip(tabs, (map_tab, list_tab, ai_tab, vlog_tab, feedback_tab)):
+        with tab:
+            if tab.open:
+                render()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,115 @@
+"""무거운 모듈 지연 로딩 + import 시간 리포트
+
+app.py는 스트림릿이 rerun 때마다 다시 실행하지만 이 모듈은 프로세스당 한 번만
+import 되므로, 로딩 기록(IMPORT_TIMES)이 세션/rerun 사이에 유지된다.
+
+    python lazy_imports.py    # 콜드 스타트 첫 화면 시간 비교 (지연 vs 즉시)
+"""
+
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+IMPORT_TIMES = {}     # 모듈명 -> 실제 로딩에 걸린 시간(초)
+REGISTERED = []       # LazyModule로 등록된 모듈명 (등록 순서)
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """속성에 처음 접근할 때 실제 import 하는 모듈 프록시"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        with _lock:
+            if name not in REGISTERED:
+                REGISTERED.append(name)
+
+    def _load(self):
+        if self._module is None:
+            already = self._name in sys.modules
+            start = time.perf_counter()
+            module = importlib.import_module(self._name)
+            with _lock:
+                if not already and self._name not in IMPORT_TIMES:
+                    IMPORT_TIMES[self._name] = time.perf_counter() - start
+            self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def import_report() -> list:
+    """등록된 무거운 모듈별 로딩 여부/시간. 아직 로딩 안 된 모듈 = 시작 시간 절약분"""
+    return [
+        {
+            "module": name,
+            "loaded": name in sys.modules,
+            "ms": round(IMPORT_TIMES.get(name, 0.0) * 1000, 1),
+        }
+        for name in REGISTERED
+    ]
+
+
+def _run_fresh(code: str, setup: str) -> list:
+    """새 프로세스에서 code 실행 후 stdout 줄 목록 (앱 폴더 기준)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    prefix = f"import {setup}\n" if setup else ""
+    out = subprocess.run(
+        [sys.executable, "-c", prefix + code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=here,
+    )
+    return out.stdout.strip().splitlines()
+
+
+# 첫 화면(AppTest 1회 실행)까지 걸린 시간. eager=1이면 등록된 무거운 모듈을 미리 전부 import
+_FIRST_RENDER = """
+import importlib, sys, time
+eager = {eager}
+t = time.perf_counter()
+if eager:
+    import app, lazy_imports
+    for name in lazy_imports.REGISTERED:
+        importlib.import_module(name)
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+elapsed = time.perf_counter() - t
+if at.exception:
+    sys.exit("first render failed: " + at.exception[0].message)
+import lazy_imports
+for row in lazy_imports.import_report():
+    print(row["module"], int(row["module"] in sys.modules))
+print(elapsed)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="콜드 스타트 첫 화면 시간 비교 (지연 import vs 즉시 import)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--setup", default="", help="측정 전에 import 할 모듈 (예: 네트워크 없는 환경에서 지오코더 대체)")
+    args = parser.parse_args()
+
+    lazy_runs = [_run_fresh(_FIRST_RENDER.format(eager=0), args.setup) for _ in range(args.runs)]
+    eager_runs = [_run_fresh(_FIRST_RENDER.format(eager=1), args.setup) for _ in range(args.runs)]
+    lazy = min(float(r[-1]) for r in lazy_runs)
+    eager = min(float(r[-1]) for r in eager_runs)
+
+    loaded = [line.split() for line in lazy_runs[0][:-1]]
+    print("loaded by first render: " + ", ".join(m for m, flag in loaded if flag == "1"))
+    print("still deferred:         " + (", ".join(m for m, flag in loaded if flag == "0") or "-"))
+    print(f"first render (lazy):    {lazy * 1000:7.1f} ms")
+    print(f"first render (eager):   {eager * 1000:7.1f} ms")
+    print(f"saved at cold start:    {(eager - lazy) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
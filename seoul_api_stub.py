@@ -0,0 +1,119 @@
+"""서울 열린데이터 API 스텁 서버 (로컬 동기화 테스트용)
+
+CSV를 `/{KEY}/json/{SERVICE}/{START}/{END}/` 형식의 페이지로 제공한다.
+페이지마다 ETag를 붙이고 If-None-Match가 맞으면 304를 돌려주며,
+CSV 파일이 수정되면 다음 요청부터 바뀐 내용을 제공한다.
+
+    python seoul_api_stub.py --port 8089 --fail-rate 0.2 --error-page 2001
+
+.streamlit/secrets.toml:
+    SEOUL_API_KEY = "test"
+    SEOUL_API_BASE = "http://127.0.0.1:8089"
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def read_rows(file_path: str):
+    for enc in ("utf-8", "cp949", "euc-kr"):
+        try:
+            with open(file_path, encoding=enc, newline="") as f:
+                return list(csv.DictReader(f))
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"cannot decode {file_path}")
+
+
+class StubState:
+    def __init__(self, file_path: str, fail_rate: float = 0.0, error_pages=()):
+        self.file_path = file_path
+        self.fail_rate = fail_rate
+        # 시작 번호가 여기 있는 페이지는 실제 API처럼 HTTP 200 + 오류 RESULT로 응답
+        self.error_pages = set(error_pages)
+        self.mtime = None
+        self.rows = []
+
+    def current_rows(self):
+        mtime = os.path.getmtime(self.file_path)
+        if mtime != self.mtime:
+            self.rows = read_rows(self.file_path)
+            self.mtime = mtime
+        return self.rows
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = [p for p in self.path.split("/") if p]
+            if len(parts) < 5 or parts[1] != "json":
+                self.send_error(404)
+                return
+            if random.random() < state.fail_rate:
+                self.send_error(503)
+                return
+
+            service = parts[2]
+            start, end = int(parts[3]), int(parts[4])
+            rows = state.current_rows()
+            page = rows[start - 1:end]
+
+            if start in state.error_pages:
+                body = json.dumps(
+                    {"RESULT": {"CODE": "ERROR-500", "MESSAGE": "서버 오류입니다."}}, ensure_ascii=False
+                ).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            if page:
+                result = {"CODE": "INFO-000", "MESSAGE": "정상 처리되었습니다"}
+            else:
+                result = {"CODE": "INFO-200", "MESSAGE": "해당하는 데이터가 없습니다."}
+            body = json.dumps(
+                {service: {"list_total_count": len(rows), "RESULT": result, "row": page}},
+                ensure_ascii=False,
+            ).encode("utf-8")
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default="seoul_toilet.csv")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="503 응답 비율 (재시도 확인용)")
+    parser.add_argument("--error-page", type=int, action="append", default=[],
+                        help="이 시작 번호의 페이지는 ERROR-500 RESULT로 응답")
+    args = parser.parse_args()
+
+    state = StubState(args.csv, args.fail_rate, args.error_page)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(state))
+    print(f"stub Seoul API on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
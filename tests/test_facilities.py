@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import app
+
+MON_10 = datetime(2026, 10, 19, 10, 0)
+MON_2330 = datetime(2026, 10, 19, 23, 30)
+TUE_03 = datetime(2026, 10, 20, 3, 0)
+TUE_10 = datetime(2026, 10, 20, 10, 0)
+SAT_10 = datetime(2026, 10, 24, 10, 0)
+
+COLUMNS = ["연번", "건물명", "x 좌표", "y 좌표", "개방시간", "소재지 용도",
+           "화장실 현황", "장애인화장실 현황", "편의시설 (기타설비)", "안내표지"]
+ROWS = [
+    # 연번, 개방시간, 소재지 용도(휴무), 화장실 현황, 장애인화장실 현황, 편의시설, 안내표지
+    (1, "정시(09:00~18:00)|", "월요일|", "남자|여자|", " ", "기저귀교환대(여)|", " 비상벨(남)|비상벨(여)|"),
+    (2, "상시(24시간)|", " ", "공용|", "공용|", " ", "출입구CCTV|"),
+    (3, "정시(22:00~익일 06:00)|", " ", "남자|여자|", "남자|여자|", "기저귀교환대(남)|", "비상벨(여)|출입구CCTV|"),
+    (4, "정시(00:00~00:00)|", " ", " ", " ", " ", " "),
+    (5, "정시(09:00~18:00,평일)|", " ", " ", " ", " ", " "),
+    (6, "정시(영업시작~종료)|", " ", " ", " ", " ", " "),
+    (7, "정시(09:00~18:00)|", "기타|둘째,넷째 월요일|", " ", " ", " ", " "),
+]
+
+
+@pytest.fixture
+def raw():
+    rows = [(str(i), f"화장실{i}", "127.0", "37.5", *rest) for i, *rest in ROWS]
+    return pd.DataFrame(rows, columns=COLUMNS, dtype=str)
+
+
+@pytest.fixture
+def df(raw):
+    return app.normalize_toilet_frame(raw)
+
+
+def open_ids(df, now):
+    return df.index[app.open_now_mask(df, now)].tolist()
+
+
+def test_hours_parsed_to_minutes(raw):
+    cols = app.facility_columns(raw)
+    assert cols["open_min"].tolist() == [540, -1, 1320, 0, 540, -1, 540]
+    assert cols["close_min"].tolist() == [1080, -1, 360, 0, 1080, -1, 1080]
+
+
+def test_facility_bits(raw):
+    fac = app.facility_columns(raw)["fac"].tolist()
+    assert fac[0] == app.FAC_DIAPER | app.FAC_BELL | app.FAC_MALE | app.FAC_FEMALE
+    assert fac[1] == app.FAC_UNISEX | app.FAC_DISABLED | app.FAC_CCTV | app.FAC_ALWAYS_OPEN
+    assert fac[2] == (app.FAC_DIAPER | app.FAC_BELL | app.FAC_CCTV | app.FAC_DISABLED
+                      | app.FAC_MALE | app.FAC_FEMALE)
+    assert fac[3] == app.FAC_ALWAYS_OPEN  # 00:00~00:00 = 24시간
+
+
+def test_closed_days(raw):
+    closed = app.facility_columns(raw)["closed_days"].tolist()
+    assert closed[0] == 0b0000001           # 월요일 휴무
+    assert closed[4] == 0b1100000           # 평일만 개방 -> 토/일 휴무
+    assert closed[6] == 0                   # 격주 휴무(기타)는 요일 휴무로 보지 않음
+
+
+def test_open_now(df):
+    assert open_ids(df, MON_10) == [2, 4, 5, 7]
+    assert open_ids(df, MON_2330) == [2, 3, 4]
+    assert open_ids(df, TUE_03) == [2, 3, 4]     # 익일 06:00까지
+    assert open_ids(df, TUE_10) == [1, 2, 4, 5, 7]
+    assert open_ids(df, SAT_10) == [1, 2, 4, 7]  # 평일만 개방하는 곳은 닫힘
+
+
+def test_filter_is_and_of_bits(df):
+    assert app.filter_facilities(df, ["diaper", "bell"]).index.tolist() == [1, 3]
+    assert app.filter_facilities(df, ["diaper", "bell", "open_now"], MON_10).empty
+    assert app.filter_facilities(df, ["diaper", "bell", "open_now"], TUE_10).index.tolist() == [1]
+    assert app.filter_facilities(df, ["diaper", "bell", "open_now"], MON_2330).index.tolist() == [3]
+    assert app.filter_facilities(df, []).equals(df)
@@ -0,0 +1,97 @@
+import functools
+
+import pytest
+
+import app
+
+CITY_HALL = (37.5663, 126.9779)
+GANGNAM = (37.4979, 127.0276)
+
+
+@pytest.fixture
+def store():
+    return app.ToiletStore(app.read_toilet_csv())
+
+
+def nearby(store, cache, point, radius=1.0, snapshot=None):
+    df, token = snapshot or store.snapshot()
+    return app.find_nearby(df, "toilet", token, point[0], point[1], radius, cache)
+
+
+def move_row(store, toilet_id, lat, lon):
+    raw = app.read_toilet_csv()
+    raw.loc[raw[app.TOILET_KEY] == str(toilet_id), ["y 좌표", "x 좌표"]] = [str(lat), str(lon)]
+    return store.apply_snapshot(raw)
+
+
+def test_delta_evicts_only_affected_cells(store):
+    cache = app.NearbyCache()
+    store.listeners["nearby_cache"] = functools.partial(cache.evict_points, "toilet", store.loaded_at)
+    near_hall = nearby(store, cache, CITY_HALL)
+    nearby(store, cache, GANGNAM)
+    assert cache.stats()["entries"] == 2
+
+    # 시청 근처 화장실 하나를 조금 옮김 -> 시청 항목만 제거
+    moved = near_hall.index[0]
+    assert move_row(store, moved, CITY_HALL[0] + 0.001, CITY_HALL[1]) == (0, 1, 0)
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["delta_evictions"] == 1
+    assert stats["invalidations"] == 0
+
+    hits = cache.stats()["hits"]
+    nearby(store, cache, GANGNAM)
+    assert cache.stats()["hits"] == hits + 1
+
+    fresh = nearby(store, cache, CITY_HALL)
+    df, _ = store.snapshot()
+    full = app.add_distance(df, *CITY_HALL)
+    assert set(fresh.index) == set(full[full["dist"] <= 1.0].index)
+
+
+def test_older_snapshot_does_not_reset_cache(store):
+    cache = app.NearbyCache()
+    store.listeners["nearby_cache"] = functools.partial(cache.evict_points, "toilet", store.loaded_at)
+    old_snapshot = store.snapshot()
+    move_row(store, int(old_snapshot[0].index[0]), 37.6, 127.0)
+
+    nearby(store, cache, GANGNAM)
+    entries = cache.stats()["entries"]
+    result = nearby(store, cache, CITY_HALL, snapshot=old_snapshot)
+    assert not result.empty
+    assert cache.stats()["entries"] == entries
+    assert cache.stats()["invalidations"] == 0
+    assert cache.tokens["toilet"] == store.snapshot()[1]
+
+
+def test_reload_invalidates_kind(store):
+    cache = app.NearbyCache()
+    nearby(store, cache, CITY_HALL)
+    reloaded = app.ToiletStore(app.read_toilet_csv())
+    reloaded.loaded_at = store.loaded_at + 1
+    nearby(reloaded, cache, GANGNAM)
+    stats = cache.stats()
+    assert stats["invalidations"] == 1
+    assert stats["entries"] == 1
+
+
+def test_missed_delta_drops_kind(store):
+    cache = app.NearbyCache()
+    near_hall = nearby(store, cache, CITY_HALL)
+    near_gangnam = nearby(store, cache, GANGNAM)
+
+    # 리스너 없이 시청 근처 행 삭제 -> 캐시는 이 델타를 모름
+    raw = app.read_toilet_csv()
+    deleted = int(near_hall.index[0])
+    raw = raw[raw[app.TOILET_KEY] != str(deleted)]
+    assert store.apply_snapshot(raw) == (0, 0, 1)
+
+    # 다음 델타(강남)부터 리스너 연결
+    store.listeners["nearby_cache"] = functools.partial(cache.evict_points, "toilet", store.loaded_at)
+    raw.loc[raw[app.TOILET_KEY] == str(near_gangnam.index[0]), "건물명"] = "변경"
+    assert store.apply_snapshot(raw) == (0, 1, 0)
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["entries"] == 0
+
+    result = nearby(store, cache, CITY_HALL)
+    assert deleted not in result.index
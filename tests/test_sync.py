@@ -0,0 +1,159 @@
+import csv
+import os
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import app
+import seoul_api_stub
+
+SEED_ROWS = 25
+PAGE_SIZE = 10
+
+
+def write_rows(path, header, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, header, quoting=csv.QUOTE_ALL)
+        writer.writeheader()
+        writer.writerows(rows)
+    # 스텁은 mtime이 바뀌어야 다시 읽으므로 같은 초 안의 재기록도 반영되게 함
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def seed(tmp_path):
+    rows = seoul_api_stub.read_rows(os.path.join(os.path.dirname(app.__file__), "seoul_toilet.csv"))[:SEED_ROWS]
+    path = tmp_path / "live.csv"
+    write_rows(path, list(rows[0]), rows)
+    return path, rows
+
+
+@pytest.fixture
+def stub(seed):
+    path, _ = seed
+    state = seoul_api_stub.StubState(str(path))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), seoul_api_stub.make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield state, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def sync(store, base_url):
+    app.sync_toilet_store(store, "test", base_url=base_url, page_size=PAGE_SIZE)
+
+
+def test_sync_applies_only_delta(seed, stub):
+    path, rows = seed
+    _, base_url = stub
+    store = app.ToiletStore(app.read_toilet_csv(str(path)))
+
+    sync(store, base_url)
+    assert store.last_error is None
+    assert store.version == 0
+
+    header = list(rows[0])
+    deleted_id = int(rows[0]["연번"])
+    updated_id = int(rows[1]["연번"])
+    changed = [dict(r) for r in rows[1:]]
+    changed[0]["건물명"] = "변경된 건물"
+    inserted = dict(rows[2], 연번="999999")
+    write_rows(path, header, changed + [inserted])
+
+    sync(store, base_url)
+    assert store.last_error is None
+    assert store.last_delta == (1, 1, 1)
+    assert deleted_id not in store.df.index
+    assert store.df.loc[updated_id, "name"] == "변경된 건물"
+    assert 999999 in store.df.index
+
+
+def test_error_page_keeps_table(seed, stub):
+    path, _ = seed
+    state, base_url = stub
+    store = app.ToiletStore(app.read_toilet_csv(str(path)))
+    before = store.df.index.tolist()
+
+    state.error_pages = {PAGE_SIZE + 1}
+    sync(store, base_url)
+
+    assert "ERROR-500" in store.last_error
+    assert store.version == 0
+    assert store.df.index.tolist() == before
+
+
+def test_other_key_space_is_refused(seed, stub):
+    path, rows = seed
+    _, base_url = stub
+    store = app.ToiletStore(app.read_toilet_csv(str(path)))
+    before = store.df.index.tolist()
+
+    write_rows(path, list(rows[0]), [dict(r, 연번=str(int(r["연번"]) + 1_000_000)) for r in rows])
+    sync(store, base_url)
+
+    assert "key space" in store.last_error
+    assert store.version == 0
+    assert store.df.index.tolist() == before
+
+
+def test_feed_without_hours_keeps_them(seed, stub):
+    path, rows = seed
+    _, base_url = stub
+    store = app.ToiletStore(app.read_toilet_csv(str(path)))
+    before = store.df[["hours", "fac", "open_min", "close_min", "closed_days"]].copy()
+
+    header = ["연번", "건물명", "x 좌표", "y 좌표"]
+    narrow = [{c: r[c] for c in header} for r in rows]
+    narrow[0]["건물명"] = "변경된 건물"
+    write_rows(path, header, narrow)
+    sync(store, base_url)
+
+    updated_id = int(rows[0]["연번"])
+    assert store.last_error is None
+    assert store.last_delta == (0, 1, 0)
+    assert store.df.loc[updated_id, "name"] == "변경된 건물"
+    assert store.df.loc[before.index, before.columns].equals(before)
+
+
+def test_unchanged_sync_reuses_pages(seed, stub, monkeypatch):
+    path, _ = seed
+    _, base_url = stub
+    store = app.ToiletStore(app.read_toilet_csv(str(path)))
+    sync(store, base_url)
+
+    statuses = []
+    fetch = app.fetch_with_retry
+
+    def recording_fetch(url, headers, *args, **kwargs):
+        r = fetch(url, headers, *args, **kwargs)
+        statuses.append(r.status_code)
+        return r
+
+    monkeypatch.setattr(app, "fetch_with_retry", recording_fetch)
+    sync(store, base_url)
+
+    assert statuses == [304] * 3
+    assert store.last_error is None
+    assert store.version == 0
+
+
+def test_transient_503_is_retried(seed, stub, monkeypatch):
+    path, _ = seed
+    state, base_url = stub
+    store = app.ToiletStore(app.read_toilet_csv(str(path)))
+    delays = []
+
+    def fake_sleep(seconds):
+        delays.append(seconds)
+        state.fail_rate = 0.0  # 첫 요청만 503
+
+    monkeypatch.setattr(app.time, "sleep", fake_sleep)
+    state.fail_rate = 1.0
+    sync(store, base_url)
+
+    assert delays == [0.5]
+    assert store.last_error is None
+    assert store.page_cache["total"] == SEED_ROWS
+    assert store.version == 0